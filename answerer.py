@@ -13,13 +13,33 @@ Requires:
     - GROQ_API_KEY set in .env
 """
 
+import asyncio
+import contextlib
+import copy
+import json
 import logging
 import os
-from typing import Optional
-
+import sqlite3
+import sys
+import threading
+import time
+import types
+from collections import OrderedDict
+from operator import itemgetter
+from typing import TYPE_CHECKING, AsyncIterator, Callable, Iterator, Optional
+
+import httpx
+import orjson
 import requests
 from dotenv import load_dotenv
-from groq import Groq
+from groq import AsyncGroq, DefaultAsyncHttpxClient, DefaultHttpxClient, Groq
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+if TYPE_CHECKING:
+    # Imported lazily by SemanticCache — torch/transformers are heavy, and a
+    # missing package must only disable the cache, not break the import
+    from sentence_transformers import SentenceTransformer
 
 # ---------------------------------------------------------------------------
 # Configuration
@@ -27,26 +47,89 @@ from groq import Groq
 
 load_dotenv()
 
-# Groq API client — reads GROQ_API_KEY from environment automatically
-client = Groq(api_key=os.environ.get("GROQ_API_KEY"))
+# Groq API client — reads GROQ_API_KEY from environment automatically.
+# Created once at module scope and backed by an HTTP/2 connection pool, so
+# every query multiplexes over the same connection to the API.
+client = Groq(
+    api_key=os.environ.get("GROQ_API_KEY"),
+    http_client=DefaultHttpxClient(http2=True),
+)
 
 # Pathway VectorStoreServer endpoint
 VECTOR_STORE_URL: str = os.getenv(
     "VECTOR_STORE_URL", "http://127.0.0.1:8000/v1/retrieve"
 )
 
+# Persistent HTTP session for the vector store — keeps TCP connections alive
+# across queries instead of reconnecting on every retrieval. Retrieval is
+# read-only, so POSTs are safe to retry on transient gateway errors. Read
+# timeouts are not retried, so a stalled server fails after one timeout.
+_session = requests.Session()
+_adapter = HTTPAdapter(
+    pool_connections=1,
+    pool_maxsize=16,
+    max_retries=Retry(
+        total=2,
+        read=False,
+        backoff_factor=0.1,
+        status_forcelist=[502, 503, 504],
+        allowed_methods=frozenset({"POST"}),
+        # Hand the final error response to raise_for_status() below
+        raise_on_status=False,
+    ),
+)
+_session.mount("http://", _adapter)
+_session.mount("https://", _adapter)
+
+# Batched retrieval endpoint served by main.py: one POST carries every query
+# of a batch so Pathway can embed them together. Defaults to the same server
+# as VECTOR_STORE_URL. If it is unreachable or missing (404/405, e.g. an
+# older server), the client falls back to concurrent single-query requests.
+VECTOR_STORE_BATCH_URL: str = os.getenv(
+    "VECTOR_STORE_BATCH_URL",
+    VECTOR_STORE_URL.removesuffix("/v1/retrieve") + "/v1/retrieve_batch",
+)
+
 # Number of document chunks to retrieve per query (top-k)
 TOP_K: int = int(os.getenv("RETRIEVAL_TOP_K", 3))
 
+# Length of the evidence snippet attached to each retrieved chunk, and the
+# table that flattens newlines, carriage returns and tabs to spaces in it
+SNIPPET_CHARS: int = 160
+_NL_TABLE = str.maketrans("\n\r\t", "   ")
+
+# Pre-serialised `{"k":TOP_K` prefix of the retrieve request body, so the
+# common case only has to encode the question itself
+_PAYLOAD_PREFIX: bytes = orjson.dumps({"k": TOP_K})[:-1]
+
+# Exact-match cache for retrieval payloads. Entries expire after the TTL so
+# document changes picked up by Pathway (Drive updates) eventually propagate.
+# A size or TTL of 0 disables the cache.
+RETRIEVAL_CACHE_SIZE: int = int(os.getenv("RETRIEVAL_CACHE_SIZE", 512))
+RETRIEVAL_CACHE_TTL_SECONDS: int = int(os.getenv("RETRIEVAL_CACHE_TTL_SECONDS", 60))
+
+# Maximum number of batch questions in flight at once — keeps concurrent
+# Groq requests within the account's rate limits
+BATCH_CONCURRENCY: int = int(os.getenv("BATCH_CONCURRENCY", 8))
+
 # Groq model to use for compliance reasoning
 GROQ_MODEL: str = "llama-3.3-70b-versatile"
 
 # LLM temperature — low value enforces factual, deterministic responses
 LLM_TEMPERATURE: float = 0.1
 
+# Prefix of the answer string returned when generation fails, including
+# after part of a streamed answer was already delivered via on_token
+LLM_ERROR_PREFIX: str = "LLM error: "
+
 # System prompt that establishes the "Senior Compliance Officer" persona.
 # The constraints here are deliberate: the model is instructed to stay
 # grounded in retrieved context, cite sources, and use formal language.
+#
+# KV-CACHE PREFIX: do not mutate. This string is sent byte-identical as the
+# first message of every request so Groq can reuse its cached prefill for
+# it. Keep it free of interpolation — per-query content (context, question)
+# belongs only in the trailing user message.
 SYSTEM_PROMPT: str = (
     "You are a Senior Financial Audit & Compliance Officer with deep expertise "
     "in regulatory frameworks (Basel III/IV, SEC, GDPR, SEBI, FINRA). "
@@ -61,6 +144,19 @@ SYSTEM_PROMPT: str = (
     "- Use formal, jurisdiction-appropriate language throughout."
 )
 
+# Prebuilt, read-only system message shared by every chat request, so the
+# prefix above is never rebuilt or accidentally mutated per call.
+_SYSTEM_MSG = types.MappingProxyType({"role": "system", "content": SYSTEM_PROMPT})
+
+# Semantic response cache. Questions are embedded locally with the same
+# model main.py uses for documents; a prior answer is reused when a new
+# question is at least SEMANTIC_CACHE_THRESHOLD cosine-similar to a cached
+# one and the entry is younger than the TTL (regulations change).
+EMBEDDING_MODEL: str = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+SEMANTIC_CACHE_PATH: str = os.getenv("SEMANTIC_CACHE_PATH", ".semantic_cache.db")
+SEMANTIC_CACHE_THRESHOLD: float = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", 0.95))
+SEMANTIC_CACHE_TTL_SECONDS: int = int(os.getenv("SEMANTIC_CACHE_TTL_SECONDS", 3600))
+
 # ---------------------------------------------------------------------------
 # Logging
 # ---------------------------------------------------------------------------
@@ -73,32 +169,292 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+# ---------------------------------------------------------------------------
+# Semantic Response Cache
+# ---------------------------------------------------------------------------
+
+class SemanticCache:
+    """
+    SQLite + sqlite-vec store of previous (chunks, answer, sources) results,
+    looked up by cosine similarity of the question embedding.
+
+    Entries are partitioned by namespace (the Groq model), so switching
+    models never serves answers produced by a different one. Any cache
+    failure (model download, sqlite extension loading, I/O) is logged once
+    and disables the cache for the rest of the process — it never breaks
+    the query pipeline; embed() then returns None and callers skip caching.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        namespace: str,
+        threshold: float = SEMANTIC_CACHE_THRESHOLD,
+        ttl_seconds: int = SEMANTIC_CACHE_TTL_SECONDS,
+    ):
+        self.path = path
+        self.namespace = namespace
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self._model: Optional["SentenceTransformer"] = None
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self.enabled = True
+
+    def _disable(self, action: str, error: Exception) -> None:
+        logger.warning(
+            "Semantic cache %s failed; disabling it for this process: %s",
+            action,
+            error,
+        )
+        self.enabled = False
+
+    def _get_model(self) -> "SentenceTransformer":
+        # Loaded lazily so importing answerer.py stays cheap
+        if self._model is None:
+            from sentence_transformers import SentenceTransformer
+
+            logger.info("Loading semantic cache embedding model '%s'.", EMBEDDING_MODEL)
+            self._model = SentenceTransformer(EMBEDDING_MODEL)
+        return self._model
+
+    def _get_conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            import sqlite_vec
+
+            dimension = self._get_model().get_sentence_embedding_dimension()
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.enable_load_extension(True)
+            sqlite_vec.load(conn)
+            conn.enable_load_extension(False)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "id INTEGER PRIMARY KEY, namespace TEXT NOT NULL, "
+                "chunks_json TEXT NOT NULL, answer TEXT NOT NULL, "
+                "sources_json TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS response_vectors USING vec0("
+                "namespace TEXT PARTITION KEY, "
+                f"embedding float[{dimension}] distance_metric=cosine)"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def embed(self, question: str) -> Optional[bytes]:
+        """
+        Embed a question into the float32 blob format sqlite-vec expects,
+        or return None if the cache is unavailable.
+        """
+        if not self.enabled:
+            return None
+        try:
+            # Opens the database too, so a broken sqlite setup fails here
+            # before any retrieval work is done
+            with self._lock:
+                self._get_conn()
+            embedding = self._get_model().encode(question, normalize_embeddings=True)
+        except Exception as e:
+            self._disable("embedding", e)
+            return None
+        return embedding.astype("float32").tobytes()
+
+    def embed_batch(self, questions: list[str]) -> list[Optional[bytes]]:
+        """Embed several questions in a single encode() call."""
+        if not self.enabled:
+            return [None] * len(questions)
+        try:
+            with self._lock:
+                self._get_conn()
+            embeddings = self._get_model().encode(questions, normalize_embeddings=True)
+        except Exception as e:
+            self._disable("embedding", e)
+            return [None] * len(questions)
+        return [embedding.astype("float32").tobytes() for embedding in embeddings]
+
+    def lookup(
+        self, embedding: Optional[bytes]
+    ) -> Optional[tuple[list[dict], str, list[str]]]:
+        """
+        Return the cached (chunks, answer, sources) for the nearest prior
+        question, or None if it is not similar enough, has expired, or the
+        cache is unavailable.
+        """
+        if embedding is None or not self.enabled:
+            return None
+        try:
+            with self._lock:
+                conn = self._get_conn()
+                match = conn.execute(
+                    "SELECT rowid, distance FROM response_vectors "
+                    "WHERE embedding MATCH ? AND k = 1 AND namespace = ?",
+                    (embedding, self.namespace),
+                ).fetchone()
+                if match is None:
+                    return None
+
+                rowid, distance = match
+                # sqlite-vec cosine distance = 1 - cosine similarity
+                if 1 - distance < self.threshold:
+                    return None
+
+                row = conn.execute(
+                    "SELECT chunks_json, answer, sources_json, created_at "
+                    "FROM responses WHERE id = ?",
+                    (rowid,),
+                ).fetchone()
+
+            if row is None or time.time() - row[3] > self.ttl_seconds:
+                return None
+
+            # Re-annotate so entries stored before the fields existed still display
+            return _annotate_results(json.loads(row[0])), row[1], json.loads(row[2])
+        except Exception as e:
+            self._disable("lookup", e)
+            return None
+
+    def store(
+        self,
+        embedding: bytes,
+        chunks: list[dict],
+        answer: str,
+        sources: list[str],
+    ) -> None:
+        """Insert a new entry and prune entries older than the TTL."""
+        if not self.enabled:
+            return
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._get_conn()
+                with conn:
+                    expired = [
+                        (rowid,) for (rowid,) in conn.execute(
+                            "SELECT id FROM responses WHERE created_at < ?",
+                            (now - self.ttl_seconds,),
+                        )
+                    ]
+                    conn.executemany("DELETE FROM responses WHERE id = ?", expired)
+                    conn.executemany(
+                        "DELETE FROM response_vectors WHERE rowid = ?", expired
+                    )
+
+                    cursor = conn.execute(
+                        "INSERT INTO responses "
+                        "(namespace, chunks_json, answer, sources_json, created_at) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (
+                            self.namespace,
+                            json.dumps(chunks),
+                            answer,
+                            json.dumps(sources),
+                            now,
+                        ),
+                    )
+                    conn.execute(
+                        "INSERT INTO response_vectors (rowid, namespace, embedding) "
+                        "VALUES (?, ?, ?)",
+                        (cursor.lastrowid, self.namespace, embedding),
+                    )
+        except Exception as e:
+            self._disable("insert", e)
+
+
+# Module-level cache shared by every query in this process
+_sem_cache = SemanticCache(SEMANTIC_CACHE_PATH, namespace=GROQ_MODEL)
+
+
 # ---------------------------------------------------------------------------
 # Core Functions
 # ---------------------------------------------------------------------------
 
+def _encode_retrieve_payload(question: str, top_k: int) -> bytes:
+    """
+    Build the JSON body for a /v1/retrieve request. The default top-k
+    reuses the pre-serialised prefix; other values take the generic path.
+    """
+    if top_k != TOP_K:
+        return orjson.dumps({"query": question, "k": top_k})
+    return _PAYLOAD_PREFIX + b',"query":' + orjson.dumps(question) + b"}"
+
+
+def _annotate_results(results: list[dict]) -> list[dict]:
+    """
+    Materialise display fields on retrieved chunks once, right after
+    retrieval: 'similarity' (1 - dist) and a single-line 'snippet'.
+    """
+    for chunk in results:
+        chunk["similarity"] = 1.0 - chunk["dist"]
+        chunk["snippet"] = chunk["text"][:SNIPPET_CHARS].translate(_NL_TABLE)
+    return results
+
+
 def retrieve_context(question: str, top_k: int = TOP_K) -> list[dict]:
     """
     Query the Pathway VectorStoreServer and return the top-k most
     semantically relevant document chunks.
 
+    Identical questions (ignoring case and whitespace) within
+    RETRIEVAL_CACHE_TTL_SECONDS are served from an in-process LRU cache.
+    The server always receives the question exactly as the user typed it.
+
     Args:
         question: Natural language compliance query.
         top_k:    Number of chunks to retrieve.
 
     Returns:
-        List of result dicts, each containing 'text', 'dist', and 'metadata'.
+        List of result dicts, each containing 'text', 'dist', 'metadata',
+        'similarity' and 'snippet'.
 
     Raises:
         ConnectionError: If the Pathway server is unreachable.
         ValueError:      If the response format is unexpected.
     """
-    payload = {"query": question, "k": top_k}
-
+    if RETRIEVAL_CACHE_SIZE <= 0 or RETRIEVAL_CACHE_TTL_SECONDS <= 0:
+        return list(_retrieve_uncached(question, top_k))
+
+    key = (" ".join(question.lower().split()), top_k)
+    now = time.monotonic()
+    with _retrieval_cache_lock:
+        entry = _retrieval_cache.get(key)
+        if entry is not None and entry[0] > now:
+            _retrieval_cache.move_to_end(key)
+            results = entry[1]
+        else:
+            results = None
+
+    if results is None:
+        # Exceptions propagate before anything is cached, so failed
+        # requests are retried on the next call
+        results = _retrieve_uncached(question, top_k)
+        with _retrieval_cache_lock:
+            _retrieval_cache[key] = (now + RETRIEVAL_CACHE_TTL_SECONDS, results)
+            _retrieval_cache.move_to_end(key)
+            while len(_retrieval_cache) > RETRIEVAL_CACHE_SIZE:
+                _retrieval_cache.popitem(last=False)
+
+    # Callers get their own copy so they cannot mutate the cached entry
+    return copy.deepcopy(list(results))
+
+
+# (normalised question, top_k) → (expiry on the monotonic clock, results),
+# least recently used first
+_retrieval_cache: OrderedDict[tuple[str, int], tuple[float, tuple]] = OrderedDict()
+_retrieval_cache_lock = threading.Lock()
+
+
+def _retrieve_uncached(question: str, top_k: int) -> tuple:
+    """Uncached retrieval call behind retrieve_context()."""
     try:
-        response = requests.post(VECTOR_STORE_URL, json=payload, timeout=10)
+        response = _session.post(
+            VECTOR_STORE_URL,
+            data=_encode_retrieve_payload(question, top_k),
+            headers={"Content-Type": "application/json"},
+            timeout=10,
+        )
         response.raise_for_status()
-        results = response.json()
+        results = orjson.loads(response.content)
     except requests.exceptions.ConnectionError:
         raise ConnectionError(
             f"Cannot reach VectorStoreServer at {VECTOR_STORE_URL}. "
@@ -112,7 +468,11 @@ def retrieve_context(question: str, top_k: int = TOP_K) -> list[dict]:
     if not isinstance(results, list):
         raise ValueError(f"Unexpected response format from vector store: {results}")
 
-    return results
+    # Annotated before caching, so cache hits carry the fields for free
+    return tuple(_annotate_results(results))
+
+
+_get_text = itemgetter("text")
 
 
 def build_context_string(chunks: list[dict]) -> str:
@@ -126,7 +486,7 @@ def build_context_string(chunks: list[dict]) -> str:
     Returns:
         A single string of concatenated chunk texts, separated by blank lines.
     """
-    return "\n\n".join(chunk["text"] for chunk in chunks)
+    return "\n\n".join(map(_get_text, chunks))
 
 
 def extract_sources(chunks: list[dict]) -> list[str]:
@@ -137,31 +497,60 @@ def extract_sources(chunks: list[dict]) -> list[str]:
         chunks: List of chunk dicts returned by retrieve_context().
 
     Returns:
-        Deduplicated list of source document filenames.
+        Deduplicated list of source document filenames, in the order they
+        first appear in the retrieval ranking.
+    """
+    return _scan_chunks(chunks)[1]
+
+
+def _scan_chunks(chunks: list[dict]) -> tuple[list[str], list[str]]:
+    """
+    Single pass over the chunks collecting their texts and the deduplicated
+    source names (in rank order, via an insertion-ordered dict).
+    """
+    texts = []
+    sources: dict[str, None] = {}
+    for chunk in chunks:
+        texts.append(chunk["text"])
+        sources[chunk["metadata"]["name"]] = None
+    return texts, list(sources)
+
+
+def build_context_and_sources(chunks: list[dict]) -> tuple[str, list[str]]:
+    """
+    Combined build_context_string() + extract_sources() used by the query
+    pipelines, in a single pass over the chunks.
+
+    Args:
+        chunks: List of chunk dicts returned by retrieve_context().
+
+    Returns:
+        A tuple of:
+            - context (str):        Chunk texts separated by blank lines.
+            - sources (list[str]):  Deduplicated source names, in rank order.
     """
-    return list({chunk["metadata"]["name"] for chunk in chunks})
+    texts, sources = _scan_chunks(chunks)
+    return "\n\n".join(texts), sources
 
 
-def generate_compliance_response(question: str, context: str) -> str:
+def generate_compliance_response(question: str, context: str) -> Iterator[str]:
     """
     Send the retrieved context and user question to Groq (Llama-3.3-70B)
-    and return the compliance officer's response.
+    and stream back the compliance officer's response.
 
     Args:
         question: The original user question.
         context:  Concatenated text from retrieved document chunks.
 
-    Returns:
-        Formatted compliance response string from the LLM.
+    Yields:
+        Response text fragments as the LLM produces them.
     """
-    completion = client.chat.completions.create(
+    stream = client.chat.completions.create(
         model=GROQ_MODEL,
         temperature=LLM_TEMPERATURE,
+        stream=True,
         messages=[
-            {
-                "role": "system",
-                "content": SYSTEM_PROMPT,
-            },
+            _SYSTEM_MSG,
             {
                 "role": "user",
                 "content": (
@@ -171,42 +560,378 @@ def generate_compliance_response(question: str, context: str) -> str:
             },
         ],
     )
-    return completion.choices[0].message.content
+    for chunk in stream:
+        yield chunk.choices[0].delta.content or ""
 
 
 def get_compliance_answer(
     question: str,
+    no_cache: bool = False,
+    on_token: Optional[Callable[[str], None]] = None,
 ) -> tuple[Optional[list[dict]], str, list[str]]:
     """
-    Full query pipeline: retrieve → generate → return.
+    Full query pipeline: cache lookup → retrieve → generate → return.
 
     Args:
         question: Natural language compliance query.
+        no_cache: If True, bypass the semantic cache entirely (neither read
+                  nor stored). Use for sensitive prompts.
+        on_token: Optional callback invoked with each response fragment as it
+                  streams from the LLM. Not called on cache hits or errors.
 
     Returns:
         A tuple of:
             - chunks (list[dict] | None): Raw retrieval results, or None on error.
             - answer (str):              LLM response or error message string.
+                                         Generation errors start with
+                                         LLM_ERROR_PREFIX, even if tokens
+                                         were already streamed.
             - sources (list[str]):       Source document names cited.
     """
+    embedding = None
+    if not no_cache:
+        embedding = _sem_cache.embed(question)
+    if embedding is not None:
+        cached = _sem_cache.lookup(embedding)
+        if cached is not None:
+            logger.info("Semantic cache hit — skipping retrieval and LLM call.")
+            return cached
+
     try:
         chunks = retrieve_context(question)
     except (ConnectionError, ValueError) as e:
         logger.error("Retrieval failed: %s", e)
         return None, str(e), []
 
-    context = build_context_string(chunks)
-    sources = extract_sources(chunks)
+    context, sources = build_context_and_sources(chunks)
 
     try:
-        answer = generate_compliance_response(question, context)
+        tokens = []
+        for token in generate_compliance_response(question, context):
+            tokens.append(token)
+            if on_token is not None:
+                on_token(token)
+        answer = "".join(tokens)
     except Exception as e:
         logger.error("LLM generation failed: %s", e)
-        return chunks, f"LLM error: {e}", sources
+        return chunks, f"{LLM_ERROR_PREFIX}{e}", sources
+
+    # Only successful answers are cached; errors should be retried
+    if embedding is not None:
+        _sem_cache.store(embedding, chunks, answer, sources)
 
     return chunks, answer, sources
 
 
+# ---------------------------------------------------------------------------
+# Async / Batch API
+# ---------------------------------------------------------------------------
+
+class _AsyncClients:
+    """Async vector store + Groq clients bound to one event loop."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.http = httpx.AsyncClient(
+            timeout=10,
+            limits=httpx.Limits(max_connections=16, max_keepalive_connections=16),
+        )
+        self.groq = AsyncGroq(
+            api_key=os.environ.get("GROQ_API_KEY"),
+            http_client=DefaultAsyncHttpxClient(http2=True),
+        )
+        self.users = 0
+
+
+_async_clients: Optional[_AsyncClients] = None
+
+
+@contextlib.asynccontextmanager
+async def _use_async_clients() -> AsyncIterator[tuple[httpx.AsyncClient, AsyncGroq]]:
+    """
+    Borrow the async HTTP and Groq clients for the running loop, creating
+    them on first use. Pooled connections cannot outlive the loop that
+    opened them, so the clients are closed as soon as the last concurrent
+    borrower is done — one asyncio.run() per batch never leaks sockets.
+    """
+    global _async_clients
+    loop = asyncio.get_running_loop()
+    if _async_clients is None or _async_clients.loop is not loop:
+        _async_clients = _AsyncClients(loop)
+
+    clients = _async_clients
+    clients.users += 1
+    try:
+        yield clients.http, clients.groq
+    finally:
+        clients.users -= 1
+        if clients.users == 0:
+            if _async_clients is clients:
+                _async_clients = None
+            await clients.groq.close()  # also closes its httpx client
+            await clients.http.aclose()
+
+
+async def aretrieve_context(question: str, top_k: int = TOP_K) -> list[dict]:
+    """
+    Async variant of retrieve_context() using the loop's httpx client.
+
+    Args:
+        question: Natural language compliance query.
+        top_k:    Number of chunks to retrieve.
+
+    Returns:
+        List of result dicts, each containing 'text', 'dist', and 'metadata'.
+
+    Raises:
+        ConnectionError: If the Pathway server is unreachable.
+        ValueError:      If the response format is unexpected.
+    """
+    try:
+        async with _use_async_clients() as (http, _):
+            response = await http.post(
+                VECTOR_STORE_URL,
+                content=_encode_retrieve_payload(question, top_k),
+                headers={"Content-Type": "application/json"},
+            )
+        response.raise_for_status()
+        results = orjson.loads(response.content)
+    except httpx.ConnectError:
+        raise ConnectionError(
+            f"Cannot reach VectorStoreServer at {VECTOR_STORE_URL}. "
+            "Ensure main.py is running."
+        )
+    except httpx.TimeoutException:
+        raise ConnectionError("VectorStoreServer request timed out after 10 seconds.")
+    except httpx.TransportError as e:
+        # Dropped connections, protocol errors, … — like requests.ConnectionError
+        raise ConnectionError(f"VectorStoreServer request failed: {e}")
+    except httpx.HTTPStatusError as e:
+        raise ValueError(f"VectorStoreServer returned an error: {e}")
+
+    if not isinstance(results, list):
+        raise ValueError(f"Unexpected response format from vector store: {results}")
+
+    return _annotate_results(results)
+
+
+# Flipped to False once the server reports it has no batch endpoint, so
+# later batches skip straight to the fallback
+_batch_endpoint_available: bool = True
+
+
+async def aretrieve_context_batch(
+    questions: list[str], top_k: int = TOP_K
+) -> list[list[dict]]:
+    """
+    Retrieve top-k chunks for several questions with a single POST to the
+    batch endpoint, falling back to concurrent aretrieve_context() calls
+    if it cannot be reached or the server does not expose it.
+
+    Args:
+        questions: Natural language compliance queries.
+        top_k:     Number of chunks to retrieve per question.
+
+    Returns:
+        One list of result dicts per question, in input order.
+
+    Raises:
+        ConnectionError: If the Pathway server is unreachable.
+        ValueError:      If the response format is unexpected.
+    """
+    global _batch_endpoint_available
+
+    if _batch_endpoint_available:
+        payload = {"queries": questions, "k": top_k}
+
+        try:
+            async with _use_async_clients() as (http, _):
+                response = await http.post(
+                    VECTOR_STORE_BATCH_URL,
+                    content=orjson.dumps(payload),
+                    headers={"Content-Type": "application/json"},
+                )
+        except httpx.TimeoutException:
+            raise ConnectionError("VectorStoreServer request timed out after 10 seconds.")
+        except httpx.TransportError as e:
+            # Unreachable or dropped connection — possibly a separate host for
+            # the batch endpoint; the single-query path raises its own error
+            # if the server is down altogether
+            logger.warning(
+                "Batch request to %s failed (%s); using single-query requests.",
+                VECTOR_STORE_BATCH_URL,
+                e,
+            )
+            response = None
+
+        if response is None:
+            pass  # fall through to single-query requests
+        elif response.status_code in (404, 405):
+            logger.info("Batch retrieval endpoint not found; using single-query requests.")
+            _batch_endpoint_available = False
+        else:
+            try:
+                response.raise_for_status()
+            except httpx.HTTPStatusError as e:
+                raise ValueError(f"VectorStoreServer returned an error: {e}")
+
+            results = orjson.loads(response.content)
+            if not isinstance(results, list) or len(results) != len(questions):
+                raise ValueError(
+                    f"Unexpected response format from vector store: {results}"
+                )
+            return [_annotate_results(chunks) for chunks in results]
+
+    return list(await asyncio.gather(*(aretrieve_context(q, top_k) for q in questions)))
+
+
+async def agenerate_compliance_response(question: str, context: str) -> str:
+    """
+    Async variant of generate_compliance_response() using AsyncGroq.
+
+    Args:
+        question: The original user question.
+        context:  Concatenated text from retrieved document chunks.
+
+    Returns:
+        Formatted compliance response string from the LLM.
+    """
+    async with _use_async_clients() as (_, groq_client):
+        completion = await groq_client.chat.completions.create(
+            model=GROQ_MODEL,
+            temperature=LLM_TEMPERATURE,
+            messages=[
+                _SYSTEM_MSG,
+                {
+                    "role": "user",
+                    "content": (
+                        f"RETRIEVED CONTEXT:\n{context}\n\n"
+                        f"COMPLIANCE QUESTION: {question}"
+                    ),
+                },
+            ],
+        )
+    return completion.choices[0].message.content
+
+
+async def aget_compliance_answer(
+    question: str,
+    no_cache: bool = False,
+) -> tuple[Optional[list[dict]], str, list[str]]:
+    """
+    Async variant of get_compliance_answer(). Semantic cache work (local
+    embedding + SQLite) runs in a worker thread so it does not block the
+    event loop.
+
+    Args:
+        question: Natural language compliance query.
+        no_cache: If True, bypass the semantic cache entirely.
+
+    Returns:
+        Same (chunks, answer, sources) tuple as get_compliance_answer().
+    """
+    # Holds the clients for the whole call, so its requests share one pool
+    async with _use_async_clients():
+        embedding = None
+        if not no_cache:
+            embedding = await asyncio.to_thread(_sem_cache.embed, question)
+        if embedding is not None:
+            cached = await asyncio.to_thread(_sem_cache.lookup, embedding)
+            if cached is not None:
+                logger.info("Semantic cache hit — skipping retrieval and LLM call.")
+                return cached
+
+        try:
+            chunks = await aretrieve_context(question)
+        except (ConnectionError, ValueError) as e:
+            logger.error("Retrieval failed: %s", e)
+            return None, str(e), []
+
+        return await _aanswer_from_chunks(question, chunks, embedding)
+
+
+async def _aanswer_from_chunks(
+    question: str,
+    chunks: list[dict],
+    embedding: Optional[bytes],
+) -> tuple[Optional[list[dict]], str, list[str]]:
+    """
+    Generation half of the async pipeline: prompt the LLM with already
+    retrieved chunks and cache the answer if an embedding is given.
+    """
+    context, sources = build_context_and_sources(chunks)
+
+    try:
+        answer = await agenerate_compliance_response(question, context)
+    except Exception as e:
+        logger.error("LLM generation failed: %s", e)
+        return chunks, f"{LLM_ERROR_PREFIX}{e}", sources
+
+    if embedding is not None:
+        await asyncio.to_thread(_sem_cache.store, embedding, chunks, answer, sources)
+
+    return chunks, answer, sources
+
+
+async def answer_batch(
+    questions: list[str],
+    no_cache: bool = False,
+) -> list[tuple[Optional[list[dict]], str, list[str]]]:
+    """
+    Answer many questions concurrently. Semantic cache misses are retrieved
+    together via aretrieve_context_batch(), then generated with at most
+    BATCH_CONCURRENCY LLM calls in flight at any time.
+
+    Args:
+        questions: Natural language compliance queries.
+        no_cache:  If True, bypass the semantic cache for the whole batch.
+
+    Returns:
+        One (chunks, answer, sources) tuple per question, in input order.
+    """
+    # Holds the clients for the whole call, so its requests share one pool
+    async with _use_async_clients():
+        if no_cache:
+            embeddings = [None] * len(questions)
+            results = [None] * len(questions)
+        else:
+            embeddings = await asyncio.to_thread(_sem_cache.embed_batch, questions)
+            results = await asyncio.to_thread(
+                lambda: [_sem_cache.lookup(embedding) for embedding in embeddings]
+            )
+
+        pending = [i for i, cached in enumerate(results) if cached is None]
+        if len(pending) < len(questions):
+            logger.info(
+                "Semantic cache hits: %d/%d questions.",
+                len(questions) - len(pending),
+                len(questions),
+            )
+        if not pending:
+            return results
+
+        try:
+            chunk_lists = await aretrieve_context_batch(
+                [questions[i] for i in pending]
+            )
+        except (ConnectionError, ValueError) as e:
+            logger.error("Batch retrieval failed: %s", e)
+            for i in pending:
+                results[i] = (None, str(e), [])
+            return results
+
+        semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+        async def generate(i: int, chunks: list[dict]) -> None:
+            async with semaphore:
+                results[i] = await _aanswer_from_chunks(
+                    questions[i], chunks, embeddings[i]
+                )
+
+        await asyncio.gather(*(generate(i, c) for i, c in zip(pending, chunk_lists)))
+        return results
+
+
 # ---------------------------------------------------------------------------
 # Display Helpers
 # ---------------------------------------------------------------------------
@@ -214,7 +939,8 @@ def get_compliance_answer(
 def display_semantic_results(chunks: list[dict]) -> None:
     """
     Print a ranked summary of retrieved document chunks with similarity scores.
-    Similarity is derived from the distance score: similarity = 1 - dist.
+    Similarity (1 = identical, 0 = unrelated) and snippets are precomputed
+    at retrieval time: similarity = 1 - dist.
 
     Args:
         chunks: List of chunk dicts from retrieve_context().
@@ -222,13 +948,10 @@ def display_semantic_results(chunks: list[dict]) -> None:
     print("\n🧠 TOP-K SEMANTIC SEARCH RESULTS (Evidence)")
     print("─" * 50)
     for rank, chunk in enumerate(chunks, start=1):
-        # Convert distance to similarity score (1 = identical, 0 = unrelated)
-        similarity = round(1 - chunk["dist"], 4)
         source_name = chunk["metadata"]["name"]
-        snippet = chunk["text"][:160].replace("\n", " ")
 
-        print(f"  Rank {rank} | Similarity: {similarity:.4f} | Source: {source_name}")
-        print(f"  Snippet: {snippet}...")
+        print(f"  Rank {rank} | Similarity: {chunk['similarity']:.4f} | Source: {source_name}")
+        print(f"  Snippet: {chunk['snippet']}...")
         print()
 
 
@@ -281,19 +1004,41 @@ def run_demo() -> None:
         # Step 1: Semantic Retrieval
         # ------------------------------------------------------------------
         print("\n🔍 [1/3] Querying Pathway vector store...")
-        chunks, answer, sources = get_compliance_answer(query)
+
+        # ------------------------------------------------------------------
+        # Step 2: Compliance Report from LLM (streamed as it is generated)
+        # ------------------------------------------------------------------
+        streamed = False
+
+        def print_token(token: str) -> None:
+            nonlocal streamed
+            if not streamed:
+                print("\n📋 [2/3] COMPLIANCE REPORT")
+                print("─" * 50)
+                streamed = True
+            sys.stdout.write(token)
+            sys.stdout.flush()
+
+        chunks, answer, sources = get_compliance_answer(query, on_token=print_token)
 
         # If retrieval failed entirely, print the error and continue
         if chunks is None:
             print(f"\n❌ Error: {answer}")
             continue
 
-        # ------------------------------------------------------------------
-        # Step 2: Compliance Report from LLM
-        # ------------------------------------------------------------------
-        print("\n📋 [2/3] COMPLIANCE REPORT")
-        print("─" * 50)
-        print(answer)
+        if streamed:
+            print()
+
+        if answer.startswith(LLM_ERROR_PREFIX):
+            # May follow a partially streamed report — make the failure visible
+            if streamed:
+                print("\n⚠️  The report above is incomplete.")
+            print(f"\n❌ Error: {answer}")
+        elif not streamed:
+            # Cache hits arrive as one complete string
+            print("\n📋 [2/3] COMPLIANCE REPORT")
+            print("─" * 50)
+            print(answer)
 
         # ------------------------------------------------------------------
         # Step 3: Evidence & Citations
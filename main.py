@@ -11,14 +11,29 @@ Usage:
 The server will be available at http://127.0.0.1:8000 once running.
 """
 
+import asyncio
+import hashlib
 import logging
+import multiprocessing
 import os
-
+import re
+import sqlite3
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from operator import itemgetter
+from typing import Optional
+
+import numpy as np
 import pathway as pw
+import pymupdf
 from dotenv import load_dotenv
-from pathway.xpacks.llm.embedders import SentenceTransformerEmbedder
+from pathway.stdlib.indexing import UsearchKnnFactory
+from pathway.stdlib.indexing.nearest_neighbors import USearchKnn
+from pathway.xpacks.llm.document_store import DocumentStore
+from pathway.xpacks.llm.embedders import BaseEmbedder, SentenceTransformerEmbedder
 from pathway.xpacks.llm.parsers import DoclingParser
-from pathway.xpacks.llm.vector_store import VectorStoreServer
+from pathway.xpacks.llm.servers import BaseRestServer
 
 # ---------------------------------------------------------------------------
 # Configuration
@@ -44,7 +59,72 @@ EMBEDDING_MODEL: str = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
 # Inference device — "cuda" for GPU acceleration, "cpu" as fallback.
 EMBEDDING_DEVICE: str = os.getenv("EMBEDDING_DEVICE", "cuda")
 
-# Host and port for the Pathway VectorStoreServer.
+# Weight/activation precision for the embedding model. Half precision halves
+# memory bandwidth and runs on tensor cores, so it is the default on CUDA;
+# CPUs gain little from it and keep float32. Output vectors are always cast
+# to float32, the only float array type Pathway stores.
+EMBEDDING_DTYPE: str = os.getenv(
+    "EMBEDDING_DTYPE",
+    "float16" if EMBEDDING_DEVICE.startswith("cuda") else "float32",
+)
+SUPPORTED_EMBEDDING_DTYPES: tuple[str, ...] = ("float32", "float16", "bfloat16")
+
+# Batching for the embedding stage. Pathway accumulates up to
+# EMBEDDING_BATCH_SIZE chunks per embedder call; SentenceTransformer then
+# runs them through the GPU in micro-batches of EMBEDDING_ENCODE_BATCH_SIZE.
+EMBEDDING_BATCH_SIZE: int = int(os.getenv("EMBEDDING_BATCH_SIZE", 1024))
+EMBEDDING_ENCODE_BATCH_SIZE: int = int(os.getenv("EMBEDDING_ENCODE_BATCH_SIZE", 64))
+
+# Persistent embedding cache. Chunks whose text was already embedded with
+# the same model and precision (e.g. after a restart or a metadata-only
+# Drive change) are served from disk instead of the GPU.
+EMBEDDING_CACHE_PATH: str = os.getenv("EMBEDDING_CACHE_PATH", "./embedding_cache.db")
+
+# Number of worker processes that run Docling. Parsing is CPU-bound Python,
+# so separate processes sidestep the GIL. Each worker loads its own Docling
+# layout and TableFormer models — budget roughly 1-2 GB of RAM per worker,
+# on top of the embedding model — so the default stays small (at most 2,
+# leaving a core for Pathway). Raise it on ingest boxes with memory to spare.
+DOCLING_WORKERS: int = int(
+    os.getenv("DOCLING_WORKERS", min(2, max(1, (os.cpu_count() or 2) - 1)))
+)
+
+# Local directory for Pathway's persistence layer (UDF result cache). Parsed
+# Docling output is cached here so restarts replay documents from disk
+# instead of re-parsing them. Point it at fast local storage (NVMe) for
+# large corpora.
+PATHWAY_CACHE_DIR: str = os.getenv("PATHWAY_CACHE_DIR", "./Cache")
+
+# Fast-path parsing. Documents whose first page looks like plain running
+# text skip Docling and are parsed with PyMuPDF instead. The first page is
+# routed to Docling if it has more than LAYOUT_MAX_TEXT_BLOCKS text blocks
+# (forms, dense layouts), a detected table, or a central gutter at least
+# LAYOUT_MIN_GUTTER_WIDTH points wide with LAYOUT_MIN_COLUMN_WORDS or more
+# words on each side (multi-column). Up to LAYOUT_MAX_GUTTER_LINE_FRACTION
+# of the text lines may cross the gutter (titles, full-width headings).
+LAYOUT_MAX_TEXT_BLOCKS: int = int(os.getenv("LAYOUT_MAX_TEXT_BLOCKS", 60))
+LAYOUT_MIN_COLUMN_WORDS: int = int(os.getenv("LAYOUT_MIN_COLUMN_WORDS", 20))
+LAYOUT_MIN_GUTTER_WIDTH: int = int(os.getenv("LAYOUT_MIN_GUTTER_WIDTH", 12))  # points
+LAYOUT_MAX_GUTTER_LINE_FRACTION: float = float(
+    os.getenv("LAYOUT_MAX_GUTTER_LINE_FRACTION", 0.1)
+)
+
+# Maximum chunk size (characters) for the PyMuPDF rule-based chunker. Kept
+# below all-MiniLM-L6-v2's 256-token window (roughly 1,000 characters of
+# English) so no chunk text is truncated away at embedding time.
+SIMPLE_CHUNK_CHARS: int = int(os.getenv("SIMPLE_CHUNK_CHARS", 900))
+
+# HNSW (usearch) index parameters for the vector store. Approximate search
+# keeps query latency roughly flat as the corpus grows, unlike brute force.
+#   connectivity     — max graph edges per node (HNSW "M")
+#   expansion_add    — candidate list size while inserting (efConstruction)
+#   expansion_search — candidate list size while querying (efSearch)
+HNSW_CONNECTIVITY: int = int(os.getenv("HNSW_CONNECTIVITY", 16))
+HNSW_EXPANSION_ADD: int = int(os.getenv("HNSW_EXPANSION_ADD", 200))
+HNSW_EXPANSION_SEARCH: int = int(os.getenv("HNSW_EXPANSION_SEARCH", 64))
+HNSW_RESERVED_SPACE: int = int(os.getenv("HNSW_RESERVED_SPACE", 1024))
+
+# Host and port for the Pathway vector store server.
 SERVER_HOST: str = "127.0.0.1"
 SERVER_PORT: int = int(os.getenv("VECTOR_STORE_PORT", 8000))
 
@@ -60,17 +140,496 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+# ---------------------------------------------------------------------------
+# Parsing Helpers
+# ---------------------------------------------------------------------------
+
+@pw.udf
+def detect_layout(data: bytes) -> str:
+    """
+    Cheaply classify a document by inspecting its first page with PyMuPDF.
+
+    Returns:
+        "simple"  for single-column running text, safe for the fast parser.
+        "complex" for tables, multi-column layouts, scanned pages (no text
+                  layer) or anything PyMuPDF cannot open as a PDF.
+    """
+    try:
+        with pymupdf.open(stream=data, filetype="pdf") as doc:
+            if doc.page_count == 0:
+                return "complex"
+
+            page = doc[0]
+            blocks = [b for b in page.get_text("dict")["blocks"] if b["type"] == 0]
+            if not blocks or len(blocks) > LAYOUT_MAX_TEXT_BLOCKS:
+                return "complex"
+
+            if page.find_tables().tables:
+                return "complex"
+
+            # Multi-column pages have a vertical gutter near the middle that
+            # almost no text line crosses, with substantial text on both
+            # sides. covered[x] counts the lines with a word spanning x
+            # (words of one line never overlap); a few crossing lines such
+            # as the title are tolerated, every line of running text is not.
+            words = page.get_text("words")  # (x0, y0, x1, y1, word, block, line, ...)
+            width = int(page.rect.width)
+            covered = [0] * (width + 1)
+            for word in words:
+                for x in range(max(int(word[0]), 0), min(int(word[2]), width) + 1):
+                    covered[x] += 1
+
+            line_count = len({(word[5], word[6]) for word in words})
+            max_crossing = int(line_count * LAYOUT_MAX_GUTTER_LINE_FRACTION)
+
+            # A gutter must be wider than an inter-word space
+            gap = 0
+            for x in range(int(width * 0.35), int(width * 0.65)):
+                gap = 0 if covered[x] > max_crossing else gap + 1
+                if gap == LAYOUT_MIN_GUTTER_WIDTH:
+                    left = sum(1 for word in words if word[2] <= x)
+                    if min(left, len(words) - left) >= LAYOUT_MIN_COLUMN_WORDS:
+                        return "complex"
+    except Exception as e:
+        logger.debug("Layout detection fell back to Docling: %s", e)
+        return "complex"
+
+    return "simple"
+
+
+# Boundaries an oversized text block is split on, coarsest first:
+# (joiner used to re-pack the pieces, separator pattern)
+_BLOCK_SPLIT_LEVELS: tuple[tuple[str, re.Pattern], ...] = (
+    (" ", re.compile(r"(?<=[.!?])\s+")),  # sentences
+    ("\n", re.compile(r"\n")),             # lines
+    (" ", re.compile(r"\s+")),             # words
+)
+
+
+def _split_block(text: str, limit: int, level: int = 0) -> list[str]:
+    """
+    Split text longer than `limit` into pieces of at most `limit`
+    characters, on sentence, then line, then word boundaries. A single word
+    longer than `limit` is cut as a last resort.
+    """
+    if len(text) <= limit:
+        return [text]
+    if level == len(_BLOCK_SPLIT_LEVELS):
+        return [text[start:start + limit] for start in range(0, len(text), limit)]
+
+    joiner, separator = _BLOCK_SPLIT_LEVELS[level]
+    pieces: list[str] = []
+    current = ""
+    for part in separator.split(text):
+        part = part.strip()
+        if not part:
+            continue
+        for piece in _split_block(part, limit, level + 1):
+            if current and len(current) + len(joiner) + len(piece) > limit:
+                pieces.append(current)
+                current = piece
+            else:
+                current = f"{current}{joiner}{piece}" if current else piece
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+@pw.udf
+def parse_simple_pdf(data: bytes) -> list[tuple[str, dict]]:
+    """
+    Rule-based parser for simple PDFs: extracts text blocks with PyMuPDF in
+    reading order and packs them into chunks of up to SIMPLE_CHUNK_CHARS.
+    Blocks longer than that are split on sentence or line boundaries first.
+
+    Returns the same (text, metadata) chunk format as DoclingParser, with
+    the 1-based page numbers each chunk spans under "pages".
+    """
+    chunks: list[tuple[str, dict]] = []
+    buffer: list[str] = []
+    buffer_len = 0
+    pages: list[int] = []
+
+    with pymupdf.open(stream=data, filetype="pdf") as doc:
+        for page_no, page in enumerate(doc, start=1):
+            # Block tuples: (x0, y0, x1, y1, text, block_no, block_type)
+            for block in page.get_text("blocks", sort=True):
+                text = block[4].strip()
+                if block[6] != 0 or not text:
+                    continue
+
+                for piece in _split_block(text, SIMPLE_CHUNK_CHARS):
+                    # buffer_len includes the "\n\n" separators of the join
+                    if buffer and buffer_len + 2 + len(piece) > SIMPLE_CHUNK_CHARS:
+                        chunks.append(("\n\n".join(buffer), {"pages": pages}))
+                        buffer, buffer_len, pages = [], 0, []
+
+                    buffer_len += len(piece) + (2 if buffer else 0)
+                    buffer.append(piece)
+                    if not pages or pages[-1] != page_no:
+                        pages.append(page_no)
+
+    if buffer:
+        chunks.append(("\n\n".join(buffer), {"pages": pages}))
+
+    return chunks
+
+
+# Per-process DoclingParser, created lazily inside each pool worker
+_worker_parser: Optional[DoclingParser] = None
+
+# Shared process pool, created on first use so spawned workers (which
+# re-import this module) never start pools of their own
+_parse_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _docling_parse(data: bytes) -> list[tuple[str, dict]]:
+    """Worker-process entry point: parse one document with Docling."""
+    global _worker_parser
+    if _worker_parser is None:
+        _worker_parser = DoclingParser(chunk=True)
+    return asyncio.run(_worker_parser.parse(data))
+
+
+def _get_parse_pool() -> ProcessPoolExecutor:
+    global _parse_pool
+    if _parse_pool is None:
+        # "spawn" rather than fork: forking a process that already runs
+        # Pathway's engine threads is unsafe
+        _parse_pool = ProcessPoolExecutor(
+            max_workers=DOCLING_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _parse_pool
+
+
+@pw.udf(
+    executor=pw.udfs.async_executor(capacity=DOCLING_WORKERS),
+    cache_strategy=pw.udfs.DiskCache(),
+)
+async def parse_with_docling(data: bytes) -> list[tuple[str, dict]]:
+    """
+    DoclingParser(chunk=True) offloaded to a process pool, so several
+    documents are parsed in parallel instead of serialising on the GIL.
+    At most DOCLING_WORKERS documents are in flight at once.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_parse_pool(), _docling_parse, data)
+
+
+# ---------------------------------------------------------------------------
+# Embedding Cache
+# ---------------------------------------------------------------------------
+
+def _as_float32(vectors):
+    """
+    Cast encode() output to float32. A half-precision model returns float16
+    arrays, which Pathway cannot store; only the weights stay in fp16.
+    """
+    if isinstance(vectors, np.ndarray) and vectors.ndim == 1:
+        return vectors.astype(np.float32, copy=False)
+    return [np.asarray(vector, dtype=np.float32) for vector in vectors]
+
+
+class CachedSentenceTransformerEmbedder(SentenceTransformerEmbedder):
+    """
+    SentenceTransformerEmbedder with a persistent SQLite cache keyed by
+    (namespace, SHA-256 of the chunk text). Only cache misses reach the
+    model, and they are still encoded together as one batch.
+
+    The namespace should identify everything that changes the vectors
+    (model name, precision), so a model switch never returns stale vectors.
+
+    Meant for document chunks only: use uncached() for query embedding, so
+    user questions are never written to disk.
+    """
+
+    # SQLite caps the number of bound parameters per statement
+    _LOOKUP_BATCH: int = 500
+
+    def __init__(self, *args, cache_path: str, namespace: str, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cache_path = cache_path
+        self.namespace = namespace
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _get_conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.cache_path, check_same_thread=False)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "namespace TEXT NOT NULL, hash TEXT NOT NULL, vector BLOB NOT NULL, "
+                "PRIMARY KEY (namespace, hash))"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def __wrapped__(self, input: list[str], **kwargs) -> list[np.ndarray]:
+        # get_embedding_dimension() probes the embedder with a single string
+        if isinstance(input, str):
+            return self.__wrapped__([input], **kwargs)[0]
+
+        # Per-call encode() overrides change the output — bypass the cache
+        if kwargs:
+            return _as_float32(super().__wrapped__(input, **kwargs))
+
+        hashes = [hashlib.sha256(text.encode("utf-8")).hexdigest() for text in input]
+
+        with self._lock:
+            conn = self._get_conn()
+            unique_hashes = list(dict.fromkeys(hashes))
+            vectors: dict[str, np.ndarray] = {}
+            for start in range(0, len(unique_hashes), self._LOOKUP_BATCH):
+                batch = unique_hashes[start:start + self._LOOKUP_BATCH]
+                rows = conn.execute(
+                    "SELECT hash, vector FROM embeddings WHERE namespace = ? "
+                    f"AND hash IN ({', '.join('?' * len(batch))})",
+                    (self.namespace, *batch),
+                )
+                for digest, blob in rows:
+                    vectors[digest] = np.frombuffer(blob, dtype=np.float32).copy()
+
+        missing = {
+            digest: text
+            for digest, text in zip(hashes, input)
+            if digest not in vectors
+        }
+        if missing:
+            logger.debug(
+                "Embedding cache: %d hits, %d misses.",
+                len(input) - len(missing),
+                len(missing),
+            )
+            encoded = super().__wrapped__(list(missing.values()))
+            new_rows = []
+            for digest, vector in zip(missing, encoded):
+                vectors[digest] = np.asarray(vector, dtype=np.float32)
+                new_rows.append((self.namespace, digest, vectors[digest].tobytes()))
+
+            with self._lock:
+                conn = self._get_conn()
+                with conn:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO embeddings (namespace, hash, vector) "
+                        "VALUES (?, ?, ?)",
+                        new_rows,
+                    )
+
+        return [vectors[digest] for digest in hashes]
+
+    def uncached(self) -> BaseEmbedder:
+        """An embedder sharing this model that never touches the cache."""
+        return _UncachedEmbedder(self)
+
+
+class _UncachedEmbedder(BaseEmbedder):
+    """Plain SentenceTransformerEmbedder behaviour on a cached embedder's model."""
+
+    def __init__(self, source: CachedSentenceTransformerEmbedder):
+        super().__init__(max_batch_size=source.max_batch_size)
+        self._source = source
+
+    def __wrapped__(self, input: list[str], **kwargs) -> list[np.ndarray]:
+        return _as_float32(
+            SentenceTransformerEmbedder.__wrapped__(self._source, input, **kwargs)
+        )
+
+
+@dataclass(frozen=True, kw_only=True)
+class _DocumentEmbedderUSearchKnn(USearchKnn):
+    """USearchKnn that embeds indexed data with `document_embedder`."""
+
+    document_embedder: Optional[pw.UDF] = None
+
+    def __post_init__(self):
+        # Replaces USearchKnn's data embedding; queries still use `embedder`
+        embedded = self.data_column.table.with_columns(
+            _pw_embedded_column=self.document_embedder(self.data_column)
+        )
+        object.__setattr__(self, "_data_column", embedded._pw_embedded_column)
+
+
+@dataclass(kw_only=True)
+class DocumentCachedUsearchKnnFactory(UsearchKnnFactory):
+    """
+    UsearchKnnFactory that embeds documents with `document_embedder` (the
+    persistent cache) and queries with the plain `embedder`. Both must
+    produce vectors in the same space.
+    """
+
+    document_embedder: Optional[pw.UDF] = None
+
+    def build_inner_index(
+        self,
+        data_column: pw.ColumnReference,
+        metadata_column: Optional[pw.ColumnExpression] = None,
+    ) -> USearchKnn:
+        return _DocumentEmbedderUSearchKnn(
+            data_column,
+            metadata_column,
+            dimensions=self.dimensions,
+            reserved_space=self.reserved_space,
+            metric=self.metric,
+            connectivity=self.connectivity,
+            expansion_add=self.expansion_add,
+            expansion_search=self.expansion_search,
+            embedder=self.embedder,
+            document_embedder=self.document_embedder or self.embedder,
+        )
+
+
+# ---------------------------------------------------------------------------
+# Batch Retrieval
+# ---------------------------------------------------------------------------
+
+class RetrieveBatchQuerySchema(pw.Schema):
+    """Request body of /v1/retrieve_batch: several queries sharing one k."""
+
+    queries: list[str]
+    k: int
+
+
+@pw.udf
+def _enumerate_queries(queries: list[str]) -> list[tuple[int, str]]:
+    return list(enumerate(queries))
+
+
+def _order_batch_results(items: tuple) -> pw.Json:
+    # items: (position, result) pairs in arbitrary order
+    return pw.Json([result.value for _, result in sorted(items, key=itemgetter(0))])
+
+
+def retrieve_with_batches(
+    document_store: DocumentStore,
+    single_queries: pw.Table,
+    batch_queries: pw.Table,
+) -> tuple[pw.Table, pw.Table]:
+    """
+    Answer /v1/retrieve and /v1/retrieve_batch requests with one
+    retrieve_query() call. Each retrieve_query() call builds its own
+    external (HNSW) index over the whole corpus, so batches are fanned out
+    into single queries and unioned with the /v1/retrieve requests rather
+    than queried separately. Batch results are regrouped into one list per
+    query, in request order.
+
+    Returns:
+        A tuple of:
+            - results for `single_queries`, in /v1/retrieve format
+            - results for `batch_queries`: a JSON list with one
+              /v1/retrieve-style result list per query
+    """
+    fanned = (
+        batch_queries
+        .select(batch=pw.this.id, k=pw.this.k, item=_enumerate_queries(pw.this.queries))
+        .flatten(pw.this.item)
+        .select(
+            pw.this.batch,
+            position=pw.this.item[0],
+            query=pw.this.item[1],
+            k=pw.this.k,
+            metadata_filter=pw.declare_type(Optional[str], None),
+            filepath_globpattern=pw.declare_type(Optional[str], None),
+        )
+    )
+
+    query_columns = (
+        pw.this.query,
+        pw.this.k,
+        pw.this.metadata_filter,
+        pw.this.filepath_globpattern,
+    )
+    singles = single_queries.select(*query_columns)
+    fanned_singles = fanned.select(*query_columns)
+    # Request ids vs. ids derived from (batch id, position) by flatten()
+    pw.universes.promise_are_pairwise_disjoint(singles, fanned_singles)
+
+    results = document_store.retrieve_query(singles.concat(fanned_singles))
+
+    answered = fanned.select(pw.this.batch, pw.this.position) + results.restrict(fanned)
+    grouped = answered.groupby(pw.this.batch, id=pw.this.batch).reduce(
+        result=pw.apply_with_type(
+            _order_batch_results,
+            pw.Json,
+            pw.reducers.tuple(pw.make_tuple(pw.this.position, pw.this.result)),
+        )
+    )
+
+    # Batches with no queries never reach the groupby; answer them with []
+    batch_results = batch_queries.join_left(
+        grouped, pw.left.id == pw.right.id, id=pw.left.id
+    ).select(result=pw.coalesce(pw.right.result, pw.Json([])))
+
+    return results.restrict(single_queries), batch_results
+
+
+class ComplianceStoreServer(BaseRestServer):
+    """
+    DocumentStoreServer's endpoints (/v1/retrieve, /v1/statistics,
+    /v1/inputs) plus /v1/retrieve_batch, sharing one retrieval index.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        document_store: DocumentStore,
+        **rest_kwargs,
+    ):
+        super().__init__(host, port, **rest_kwargs)
+
+        rest_kwargs = {"methods": ("GET", "POST"), **rest_kwargs}
+
+        single_queries, single_writer = self._connect(
+            "/v1/retrieve", document_store.RetrieveQuerySchema, **rest_kwargs
+        )
+        batch_queries, batch_writer = self._connect(
+            "/v1/retrieve_batch", RetrieveBatchQuerySchema, **rest_kwargs
+        )
+        single_results, batch_results = retrieve_with_batches(
+            document_store, single_queries, batch_queries
+        )
+        single_writer(single_results)
+        batch_writer(batch_results)
+
+        self.serve(
+            "/v1/statistics",
+            document_store.StatisticsQuerySchema,
+            document_store.statistics_query,
+            **rest_kwargs,
+        )
+        self.serve(
+            "/v1/inputs",
+            document_store.InputsQuerySchema,
+            document_store.inputs_query,
+            **rest_kwargs,
+        )
+
+    def _connect(self, route: str, schema: type[pw.Schema], **rest_kwargs):
+        # Same connector settings as BaseRestServer.serve(), but the query
+        # table and writer are returned so several routes can share a handler
+        return pw.io.http.rest_connector(
+            webserver=self.webserver,
+            route=route,
+            schema=schema,
+            autocommit_duration_ms=50,
+            delete_completed_queries=False,
+            **rest_kwargs,
+        )
+
+
 # ---------------------------------------------------------------------------
 # Pipeline
 # ---------------------------------------------------------------------------
 
-def build_pipeline() -> VectorStoreServer:
+def build_pipeline() -> DocumentStore:
     """
     Constructs and returns the full Pathway streaming RAG pipeline.
 
     Pipeline stages:
         1. Ingest  — Stream files from Google Drive (create / update / delete events)
-        2. Parse   — Extract structured text chunks from complex PDFs via Docling
+        2. Parse   — Extract text chunks: Docling for complex PDFs, PyMuPDF for simple ones
         3. Map     — Normalize chunk schema for the vector store
         4. Embed   — Generate dense vectors locally on CUDA (no external API calls)
         5. Serve   — Expose a live, always-consistent vector search endpoint
@@ -98,23 +657,47 @@ def build_pipeline() -> VectorStoreServer:
     # struggle with: multi-column PDFs, nested tables, footnotes, etc.
     # chunk=True splits documents into semantically coherent passages,
     # which improves retrieval precision over naive fixed-size splitting.
-    logger.info("Initializing Docling parser with chunking enabled.")
+    #
+    # Docling is CPU-heavy, so it is reserved for documents that need it.
+    # detect_layout() routes single-column text PDFs to PyMuPDF, which is
+    # an order of magnitude faster; both branches emit the same chunk format.
+    # Docling results are disk-cached (PATHWAY_CACHE_DIR), so unchanged
+    # documents are not re-parsed after a restart. Docling itself runs in a
+    # pool of DOCLING_WORKERS processes (see parse_with_docling).
+    logger.info(
+        "Initializing Docling parser with chunking enabled (%d worker processes).",
+        DOCLING_WORKERS,
+    )
 
-    parser = DoclingParser(chunk=True)
+    classified = data_source.select(
+        data=pw.this.data,
+        metadata=pw.this._metadata,            # Preserve source document metadata
+        layout=detect_layout(pw.this.data),
+    )
+    complex_docs = classified.filter(pw.this.layout == "complex")
+    simple_docs = classified.filter(pw.this.layout == "simple")
+    # Complementary filters of one table — their rows can never overlap
+    pw.universes.promise_are_pairwise_disjoint(complex_docs, simple_docs)
 
     chunks = (
-        data_source
+        complex_docs
         .select(
-            doc_chunks=parser(pw.this.data),  # Parse raw bytes → list of chunks
-            metadata=pw.this._metadata,       # Preserve source document metadata
+            doc_chunks=parse_with_docling(pw.this.data),  # Raw bytes → list of chunks
+            metadata=pw.this.metadata,
+        )
+        .concat(
+            simple_docs.select(
+                doc_chunks=parse_simple_pdf(pw.this.data),
+                metadata=pw.this.metadata,
+            )
         )
-        .flatten(pw.this.doc_chunks)          # One row per chunk (explode the list)
+        .flatten(pw.this.doc_chunks)           # One row per chunk (explode the list)
     )
 
     # ------------------------------------------------------------------
     # Stage 3: Schema Normalisation
     # ------------------------------------------------------------------
-    # VectorStoreServer expects columns named `data` and `_metadata`.
+    # DocumentStore expects columns named `data` and `_metadata`.
     # We map from the parser output format to match that contract.
     documents = chunks.select(
         data=pw.this.doc_chunks[0],   # Chunk text content
@@ -128,30 +711,68 @@ def build_pipeline() -> VectorStoreServer:
     # This is a deliberate security design: regulatory documents may contain
     # MNPI (Material Non-Public Information) and must never leave the
     # secure environment via a third-party embedding API.
+    #
+    # The embedder is a batched UDF: rows are handed over as lists (up to
+    # batch_size), so each call is one encode() over many chunks rather than
+    # a kernel launch and host→device copy per chunk. Previously embedded
+    # chunk texts are served from the on-disk cache and skip the GPU. User
+    # queries share the model but bypass the cache, so they are never
+    # persisted.
+    if EMBEDDING_DTYPE not in SUPPORTED_EMBEDDING_DTYPES:
+        raise ValueError(
+            f"Unsupported EMBEDDING_DTYPE '{EMBEDDING_DTYPE}'. "
+            f"Choose one of: {', '.join(SUPPORTED_EMBEDDING_DTYPES)}."
+        )
+
     logger.info(
-        "Loading embedding model '%s' on device '%s'.",
+        "Loading embedding model '%s' on device '%s' (%s).",
         EMBEDDING_MODEL,
         EMBEDDING_DEVICE,
+        EMBEDDING_DTYPE,
     )
 
-    embedder = SentenceTransformerEmbedder(
+    embedder = CachedSentenceTransformerEmbedder(
+        cache_path=EMBEDDING_CACHE_PATH,
+        namespace=f"{EMBEDDING_MODEL}:{EMBEDDING_DTYPE}:normalized",
         model=EMBEDDING_MODEL,
         device=EMBEDDING_DEVICE,
+        batch_size=EMBEDDING_BATCH_SIZE,
+        call_kwargs={
+            "batch_size": EMBEDDING_ENCODE_BATCH_SIZE,
+            "convert_to_numpy": True,
+            # Unit vectors make cosine distance a plain dot product
+            "normalize_embeddings": True,
+        },
+        # Forwarded to SentenceTransformer → transformers.from_pretrained
+        model_kwargs={"torch_dtype": EMBEDDING_DTYPE},
     )
 
     # ------------------------------------------------------------------
     # Stage 5: In-Memory Vector Store (Live-Sync)
     # ------------------------------------------------------------------
     # Unlike external vector databases (Pinecone, Weaviate, Chroma),
-    # Pathway's VectorStoreServer is part of the same unified computation
+    # Pathway's DocumentStore is part of the same unified computation
     # graph. Index updates are applied atomically — no eventual consistency,
     # no separate indexing jobs, no knowledge gaps.
-    vector_store = VectorStoreServer(
+    #
+    # The index is an HNSW graph (usearch) with cosine distance, so
+    # retrieval stays sub-linear in corpus size and `dist` keeps its
+    # 1 - cosine similarity meaning for answerer.py.
+    retriever_factory = DocumentCachedUsearchKnnFactory(
+        embedder=embedder.uncached(),
+        document_embedder=embedder,
+        reserved_space=HNSW_RESERVED_SPACE,
+        connectivity=HNSW_CONNECTIVITY,
+        expansion_add=HNSW_EXPANSION_ADD,
+        expansion_search=HNSW_EXPANSION_SEARCH,
+    )
+
+    document_store = DocumentStore(
         documents,
-        embedder=embedder,
+        retriever_factory=retriever_factory,
     )
 
-    return vector_store
+    return document_store
 
 
 def main() -> None:
@@ -169,10 +790,14 @@ def main() -> None:
             "and update SERVICE_ACCOUNT_FILE or set GOOGLE_CREDENTIALS_PATH."
         )
 
-    vector_store = build_pipeline()
+    document_store = build_pipeline()
+
+    # Exposes /v1/retrieve, /v1/statistics and /v1/inputs for answerer.py,
+    # plus /v1/retrieve_batch for its batch API (answer_batch)
+    server = ComplianceStoreServer(SERVER_HOST, SERVER_PORT, document_store)
 
     logger.info(
-        "🚀 VectorStoreServer starting at http://%s:%d",
+        "🚀 Vector store server starting at http://%s:%d",
         SERVER_HOST,
         SERVER_PORT,
     )
@@ -180,8 +805,10 @@ def main() -> None:
 
     # Starts the HTTP server and the Pathway streaming computation.
     # This call blocks — pw.run() keeps the pipeline alive indefinitely.
-    vector_store.run_server(host=SERVER_HOST, port=SERVER_PORT)
-    pw.run()
+    server.run(
+        with_cache=True,
+        cache_backend=pw.persistence.Backend.filesystem(PATHWAY_CACHE_DIR),
+    )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,39 @@
+"""
+Unit tests for answerer.py's retrieval post-processing helpers.
+
+Run with:
+    python -m pytest tests
+"""
+
+import os
+import sys
+from pathlib import Path
+
+# The Groq clients are created at import time and require an API key
+os.environ.setdefault("GROQ_API_KEY", "test-key")
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import answerer  # noqa: E402
+
+
+def make_chunks(names: list[str]) -> list[dict]:
+    """Build retrieve_context()-shaped chunks, one per source name."""
+    return [
+        {"text": f"chunk {rank}", "dist": 0.1, "metadata": {"name": name}}
+        for rank, name in enumerate(names)
+    ]
+
+
+def test_extract_sources_dedups_in_rank_order():
+    chunks = make_chunks(["c", "a", "b", "c", "a"])
+
+    assert answerer.extract_sources(chunks) == ["c", "a", "b"]
+
+
+def test_build_context_and_sources():
+    chunks = make_chunks(["c", "a", "b", "c", "a"])
+
+    context, sources = answerer.build_context_and_sources(chunks)
+
+    assert sources == ["c", "a", "b"]
+    assert context == "chunk 0\n\nchunk 1\n\nchunk 2\n\nchunk 3\n\nchunk 4"